@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import re
 import time
 from random import randint
 from datetime import datetime
@@ -8,8 +9,10 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.select import Select
-from selenium.common.exceptions import ElementClickInterceptedException, StaleElementReferenceException, WebDriverException, NoSuchElementException
+from selenium.common.exceptions import ElementClickInterceptedException, StaleElementReferenceException, WebDriverException, NoSuchElementException, TimeoutException
 from selenium.webdriver.common.alert import Alert
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 import os
 os.environ['WDM_SSL_VERIFY'] = '0'
 #from srt_reservation.exceptions import InvalidStationNameError, InvalidDateError, InvalidDateFormatError, InvalidTimeFormatError
@@ -18,9 +21,10 @@ os.environ['WDM_SSL_VERIFY'] = '0'
 #from validation import station_list
 
 chromedriver_path = r'C:\workspace\chromedriver.exe'
+prefetch_frame = 'korail_prefetch'  # 다음 결과 페이지를 미리 받아둘 숨은 iframe 이름
 
 class KORAIL:
-    def __init__(self, dpt_stn, arr_stn, dpt_year, dpt_month, dpt_day,  dpt_tm, num_trains_to_check=2, want_reserve=False):
+    def __init__(self, dpt_stn, arr_stn, dpt_year, dpt_month, dpt_day,  dpt_tm, num_trains_to_check=2, want_reserve=False, dpt_tm_end=None):
         """
         :param dpt_stn: KORAIL 출발역
         :param arr_stn: KORAIL 도착역
@@ -28,6 +32,8 @@ class KORAIL:
         :param dpt_tm: 출발 시간 hh 형태, 반드시 짝수 ex) 06, 08, 14, ...
         :param num_trains_to_check: 검색 결과 중 예약 가능 여부 확인할 기차의 수 ex) 2일 경우 상위 2개 확인
         :param want_reserve: 예약 대기가 가능할 경우 선택 여부
+        :param dpt_tm_end: 확인할 마지막 출발 시간 hh 형태 ex) 22. 지정하면 num_trains_to_check 대신
+                           이 시간까지 모든 결과 페이지를 확인
         """
         self.login_id = '0960037025'
         self.login_psw = 'ghkrhr2ehd!'
@@ -38,6 +44,7 @@ class KORAIL:
         self.dpt_month = dpt_month
         self.dpt_day = dpt_day
         self.dpt_tm = dpt_tm
+        self.dpt_tm_end = dpt_tm_end
 
         self.num_trains_to_check = num_trains_to_check
         self.want_reserve = want_reserve
@@ -45,6 +52,7 @@ class KORAIL:
 
         self.is_booked = False  # 예약 완료 되었는지 확인용
         self.cnt_refresh = 0  # 새로고침 회수 기록
+        self.result_layout = None  # 결과 테이블 구조 (새로고침 사이에 재사용)
 
         #self.check_input()
 
@@ -126,12 +134,16 @@ class KORAIL:
             print("예약 가능 클릭")
 
             # Error handling in case that click does not work
+            col = self.result_layout["standard"] if self.result_layout else 6
             try:
-                self.driver.find_element(By.XPATH, f'//*[@id="tableResult"]/tbody/tr[{i}]/td[6]/a[1]/img').click()
+                self.driver.find_element(By.XPATH, f'//*[@id="tableResult"]/tbody/tr[{i}]/td[{col}]/a[1]/img').click()
             except ElementClickInterceptedException as err:
                 print(err)
-                self.driver.find_element(By.XPATH, f'//*[@id="tableResult"]/tbody/tr[{i}]/td[6]/a[1]/img').send_keys(Keys.ENTER)
+                self.driver.find_element(By.XPATH, f'//*[@id="tableResult"]/tbody/tr[{i}]/td[{col}]/a[1]/img').send_keys(Keys.ENTER)
                 #self.driver.find_element(By.CSS_SELECTOR, f"#tableResult > tbody > tr:nth-child({i}) > td:nth-child(6) > a:nth-child(1) > img").send_keys(Keys.ENTER)
+            except NoSuchElementException:
+                print("예약 버튼 없음")
+                return
             finally:
                 self.driver.implicitly_wait(3)
 
@@ -161,30 +173,199 @@ class KORAIL:
     def reserve_ticket(self, reservation, i):
         if "신청하기" in reservation:
             print("예약 대기 완료")
-            self.driver.find_element(By.CSS_SELECTOR,
-                                     f"#result-form > fieldset > div.tbl_wrap.th_thead > table > tbody > tr:nth-child({i}) > td:nth-child(8) > a").click()
+            col = self.result_layout["reservation"] if self.result_layout else 7
+            try:
+                self.driver.find_element(By.XPATH, f'//*[@id="tableResult"]/tbody/tr[{i}]/td[{col}]/a[1]').click()
+            except NoSuchElementException:
+                print("예약 대기 버튼 없음")
+                return
             self.is_booked = True
             return self.is_booked
+    def read_result_layout(self):
+        # 결과 테이블 헤더에서 열 위치를 찾는다. 페이지 구조는 새로고침해도 같으므로 한번만 읽음
+        if self.result_layout:
+            return self.result_layout
+
+        headers = self.driver.execute_script(
+            "return Array.from(document.querySelectorAll('#tableResult > thead th'))"
+            ".map(function (th) { return th.innerText.replace(/\\s/g, ''); });")
+
+        def find_col(name, default):
+            for idx, text in enumerate(headers or []):
+                if name in text:
+                    return idx + 1
+            return default
+
+        self.result_layout = {
+            "dpt": find_col("출발", 3),
+            "standard": find_col("일반실", 6),
+            "reservation": find_col("예약대기", 7),
+        }
+        # 열 개수가 모자란 행은 상세 정보 행이므로 건너뜀
+        self.result_layout["min_cells"] = max(self.result_layout.values())
+        return self.result_layout
+
+    def read_result_page(self, in_frame=False):
+        # 결과 행을 한번의 스크립트 호출로 모두 읽는다. in_frame 이면 미리 받아둔 다음 페이지에서 읽음
+        layout = self.read_result_layout()
+        rows = self.driver.execute_script("""
+            var layout = arguments[0];
+            var doc = document;
+            if (arguments[1]) {
+                doc = document.querySelector('iframe[name="' + arguments[1] + '"]').contentDocument;
+            }
+            // 좌석 상태는 이미지로 표시되므로 alt 텍스트도 같이 읽음
+            function cellText(cell) {
+                var alts = Array.from(cell.querySelectorAll('img')).map(function (img) { return img.alt; });
+                return cell.innerText + ' ' + alts.join(' ');
+            }
+            var rows = doc.querySelectorAll('#tableResult > tbody > tr');
+            var result = [];
+            for (var i = 0; i < rows.length; i++) {
+                var cells = rows[i].children;
+                if (cells.length < layout.min_cells) continue;
+                var standard = cells[layout.standard - 1];
+                var reservation = cells[layout.reservation - 1];
+                result.push([i + 1,
+                             cells[layout.dpt - 1].innerText,
+                             cellText(standard),
+                             cellText(reservation),
+                             !!standard.querySelector('a'),
+                             !!reservation.querySelector('a')]);
+            }
+            return result;
+        """, layout, prefetch_frame if in_frame else None)
+        return rows or []
+
+    def start_prefetch(self, in_frame=False):
+        # 다음 버튼의 스크립트를 실행하되, 폼 제출 대상을 숨은 iframe 으로 돌려서
+        # 현재 페이지는 그대로 두고 다음 페이지만 받아온다. 이미 iframe 에 받은 페이지가 있으면 그 안에서 넘김
+        return bool(self.driver.execute_script("""
+            var name = arguments[0], inFrame = arguments[1];
+            var frame = document.querySelector('iframe[name="' + name + '"]');
+            if (!frame) {
+                frame = document.createElement('iframe');
+                frame.name = name;
+                frame.style.display = 'none';
+                frame.addEventListener('load', function () { frame.setAttribute('data-loaded', '1'); });
+                document.body.appendChild(frame);
+            }
+            var win = inFrame ? frame.contentWindow : window;
+            var img = win.document.querySelector("#center img[alt='다음']");
+            var link = img && img.closest('a');
+            if (!link) return false;
+            var code = link.getAttribute('onclick') || (link.getAttribute('href') || '').replace(/^javascript:/, '');
+            if (!code) return false;
+
+            frame.setAttribute('data-loaded', '0');
+            var proto = win.HTMLFormElement.prototype, submit = proto.submit;
+            var forms = Array.from(win.document.forms);
+            var saved = forms.map(function (form) {
+                return Array.from(form.elements).map(function (el) { return el.value; });
+            });
+            if (!inFrame) {
+                proto.submit = function () {
+                    var target = this.target;
+                    this.target = name;
+                    submit.call(this);
+                    this.target = target;
+                };
+            }
+            try {
+                win.Function(code).call(link);
+            } finally {
+                proto.submit = submit;
+                // 다음 버튼 스크립트가 바꾼 현재 페이지의 폼 값을 되돌림
+                if (!inFrame) {
+                    forms.forEach(function (form, f) {
+                        Array.from(form.elements).forEach(function (el, e) { el.value = saved[f][e]; });
+                    });
+                }
+            }
+            return true;
+        """, prefetch_frame, in_frame))
+
+    def read_prefetched_page(self):
+        try:
+            WebDriverWait(self.driver, 10).until(lambda driver: driver.execute_script(
+                "var frame = document.querySelector('iframe[name=\"' + arguments[0] + '\"]');"
+                "return !!frame && frame.getAttribute('data-loaded') === '1';", prefetch_frame))
+        except TimeoutException:
+            print("다음 페이지 로딩 실패. 다시 검색")
+            return []
+        return self.read_result_page(in_frame=True)
+
+    def go_next_page(self):
+        # 다음 페이지 버튼이 없으면 마지막 페이지
+        next_btn = self.driver.find_elements(By.CSS_SELECTOR, "#center img[alt='다음']")
+        if not next_btn:
+            return False
+        old_table = self.driver.find_element(By.ID, 'tableResult')
+        next_btn[0].click()
+
+        # execute_script 는 implicitly_wait 의 영향을 받지 않으므로 새 결과 테이블이 뜰 때까지 기다림
+        try:
+            WebDriverWait(self.driver, 10).until(EC.staleness_of(old_table))
+            WebDriverWait(self.driver, 10).until(EC.presence_of_element_located((By.ID, 'tableResult')))
+        except TimeoutException:
+            print("다음 페이지 로딩 실패. 다시 검색")
+            return False
+        return True
+
+    def open_result_page(self, page):
+        # 미리 받아둔 페이지에서 예약할 기차를 찾았을 때만 실제로 페이지를 넘긴다
+        for _ in range(page - 1):
+            if not self.go_next_page():
+                return False
+        return True
+
+    def past_window(self, dpt_time, cnt_checked):
+        if self.dpt_tm_end is not None:
+            return bool(dpt_time) and int(dpt_time.group(1)) > int(self.dpt_tm_end)
+        return cnt_checked >= self.num_trains_to_check
+
+    def iter_result_trains(self):
+        # 결과 페이지를 넘기며 조회 범위 안의 기차를
+        # (페이지, 행 번호, 출발 시간, 일반실, 예약대기, 일반실 버튼 유무, 예약대기 버튼 유무) 로 반환
+        # 현재 페이지를 확인하는 동안 다음 페이지를 미리 받아둔다
+        cnt_checked = 0
+        page = 1
+        try:
+            rows = self.read_result_page()
+        except StaleElementReferenceException:
+            return
+
+        while rows:
+            last_time = re.search(r'(\d{2}):(\d{2})', rows[-1][1])
+            has_next = not self.past_window(last_time, cnt_checked + len(rows)) and self.start_prefetch(page > 1)
+
+            for row_num, dpt_text, standard_seat, reservation, can_book, can_reserve in rows:
+                dpt_time = re.search(r'(\d{2}):(\d{2})', dpt_text)
+                if self.past_window(dpt_time, cnt_checked):
+                    return
+                cnt_checked += 1
+                yield (page, row_num, dpt_time.group(0) if dpt_time else "",
+                       standard_seat, reservation, can_book, can_reserve)
+
+            if not has_next:
+                return
+            rows = self.read_prefetched_page()
+            page += 1
+
     def check_result(self):
         while True:
-            for i in range(1, 1+1):
-                num = (i*2) - 1
-                try:
-                    standard_seat = self.driver.find_element(By.CSS_SELECTOR, f"#tableResult > tbody > tr:nth-child({num}) > td:nth-child(6)").text
-                    reservation = self.driver.find_element(By.CSS_SELECTOR, f"#tableResult > tbody > tr:nth-child({num}) > td:nth-child(7)").text
-                except NoSuchElementException:
-                    standard_seat = "매진2"
-                    reservation = "매진2"
-                except StaleElementReferenceException:
-                    standard_seat = "매진"
-                    reservation = "매진"
-
-                if self.book_ticket(standard_seat, i):
-                    return self.driver
+            for page, i, dpt_time, standard_seat, reservation, can_book, can_reserve in self.iter_result_trains():
+                if can_book and "매진" not in standard_seat:
+                    if self.open_result_page(page) and self.book_ticket(standard_seat, i):
+                        return self.driver
+                    # 예약 시도 후 뒤로가기 했으면 페이지가 바뀌었으므로 다시 조회
+                    break
 
                 # 예약 대기 사용
-                if self.want_reserve:
-                    self.reserve_ticket(reservation, i)
+                if self.want_reserve and can_reserve and "신청하기" in reservation:
+                    if self.open_result_page(page):
+                        self.reserve_ticket(reservation, i)
+                    break
 
             if self.is_booked:
                 return self.driver
@@ -207,5 +388,4 @@ if __name__ == "__main__":
 
     korail = KORAIL("조치원", "영등포", "2023", "3", "10", '18')
     korail.run('0960037025', 'ghkrhr2ehd!')
-    // 삭제 테스트
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
+import re
 import time
 from random import randint
 from datetime import datetime
@@ -8,7 +9,7 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.select import Select
-from selenium.common.exceptions import ElementClickInterceptedException, StaleElementReferenceException, WebDriverException, NoSuchElementException
+from selenium.common.exceptions import ElementClickInterceptedException, StaleElementReferenceException, WebDriverException, NoSuchElementException, TimeoutException
 #from cc_reservation.exceptions import InvalidStationNameError, InvalidDateError, InvalidDateFormatError, InvalidTimeFormatError
 #from cc_reservation.validation import station_list
 from exceptions import InvalidStationNameError, InvalidDateError, InvalidDateFormatError, InvalidTimeFormatError
@@ -21,7 +22,7 @@ from selenium.webdriver.common.alert import Alert
 chromedriver_path = r'C:\workspace\chromedriver.exe'
 
 class SRT:
-    def __init__(self, dpt_stn, arr_stn, dpt_dt, dpt_tm, num_trains_to_check=2, want_reserve=False):
+    def __init__(self, dpt_stn, arr_stn, dpt_dt, dpt_tm, num_trains_to_check=2, want_reserve=False, want_weekdays=None, want_dates=None, watch_all_dates=False, recheck_interval=None):
         """
         :param dpt_stn: SRT 출발역
         :param arr_stn: SRT 도착역
@@ -29,6 +30,12 @@ class SRT:
         :param dpt_tm: 출발 시간 hh 형태, 반드시 짝수 ex) 06, 08, 14, ...
         :param num_trains_to_check: 검색 결과 중 예약 가능 여부 확인할 기차의 수 ex) 2일 경우 상위 2개 확인
         :param want_reserve: 예약 대기가 가능할 경우 선택 여부
+        :param want_weekdays: 예약할 요일 목록, 월요일이 0 ex) [5, 6] 이면 주말만
+        :param want_dates: 예약할 날짜 목록 YYYYMMDD 형태 ex) ['20230322']
+                           want_weekdays, want_dates 둘 다 없으면 dpt_dt 만 확인
+        :param watch_all_dates: 이번 달, 다음 달의 모든 날짜를 확인할지 여부
+        :param recheck_interval: 원하는 시간이 없던 날짜의 티타임을 다시 확인할 간격 (초)
+                                 None 이면 마감 후 다시 열릴 때만 확인
         """
         self.login_id = None
         self.login_psw = None
@@ -45,6 +52,16 @@ class SRT:
         self.is_booked = False  # 예약 완료 되었는지 확인용
         self.cnt_refresh = 0  # 새로고침 회수 기록
 
+        self.want_weekdays = want_weekdays
+        self.want_dates = want_dates
+        if want_weekdays is None and want_dates is None:
+            self.want_dates = [str(dpt_dt)]
+        self.watch_all_dates = watch_all_dates
+        self.recheck_interval = recheck_interval
+        self.calendar = {}  # 이전 조회의 날짜별 예약 가능 여부 {YYYYMMDD: True/False}
+        self.checked_at = {}  # 티타임 목록을 확인한 시각 {YYYYMMDD: time.monotonic()}
+        self.calendar_cells = {}  # 날짜별 달력 칸 위치 {YYYYMMDD: (달력 id, 행, 열)}
+
         self.check_input()
 
     def check_input(self):
@@ -102,8 +119,105 @@ class SRT:
         # 기차 조회 페이지로 이동
         self.driver.get('https://www.sejongcc.com/reservation/real_reservation.do')
         self.driver.implicitly_wait(5)
-        self.driver.find_element(By.XPATH, '//*[@id="calendar_view_ajax_2"]/table/tbody/tr[3]/td[2]/a').click()
-        # 해당하는 날짜가 클릭 가능한지 확인?
+        time.sleep(1)
+
+    def read_calendar(self):
+        # 이번 달, 다음 달 달력을 한번의 스크립트 호출로 모두 읽는다
+        # execute_script 는 implicitly_wait 의 영향을 받지 않으므로 달력이 뜰 때까지 기다림
+        # 다음 달 달력은 아직 안 열렸을 수 있으므로 하나라도 뜨면 있는 달력만 읽음
+        try:
+            WebDriverWait(self.driver, 10).until(lambda driver: driver.execute_script(
+                "return document.querySelectorAll('[id^=\"calendar_view_ajax_\"] > table td').length > 0"))
+        except TimeoutException:
+            print("달력 로딩 실패")
+            return {}
+
+        cells = self.driver.execute_script("""
+            var result = [];
+            var calendars = document.querySelectorAll('[id^="calendar_view_ajax_"]');
+            for (var c = 0; c < calendars.length; c++) {
+                var rows = calendars[c].querySelectorAll(':scope > table > tbody > tr');
+                for (var r = 0; r < rows.length; r++) {
+                    var tds = rows[r].querySelectorAll('td');
+                    for (var d = 0; d < tds.length; d++) {
+                        var link = tds[d].querySelector('a');
+                        result.push([calendars[c].id, calendars[c].innerText, r + 1, d + 1,
+                                     tds[d].innerText.trim(), !!link,
+                                     link ? (link.getAttribute('onclick') || '') + (link.getAttribute('href') || '') : '']);
+                    }
+                }
+            }
+            return result;
+        """) or []
+
+        calendar = {}
+        cal_ids = sorted({cell[0] for cell in cells}, key=lambda cal_id: int(re.sub(r'\D', '', cal_id) or 0))
+        today = datetime.today()
+        in_month = {}  # 달력별로 1일이 나오면 True, 다음 달 1일이 나오면 False
+        for cal_id, cal_text, row, col, day, is_open, link in cells:
+            day = re.match(r'\d{1,2}', day)
+            if not day:
+                continue
+
+            # 앞뒤로 표시된 이전 달, 다음 달 날짜는 건너뜀
+            if int(day.group(0)) == 1:
+                in_month[cal_id] = cal_id not in in_month
+            if not in_month.get(cal_id):
+                continue
+
+            # 링크에 날짜가 있으면 사용, 없으면 달력 제목의 년월, 그것도 없으면 달력 순서로 계산
+            link_dt = re.search(r'20\d{6}', link)
+            title = re.search(r'(20\d{2})\s*[.\-/년]\s*(\d{1,2})', cal_text)
+            if link_dt:
+                date = link_dt.group(0)
+            elif title:
+                date = f"{title.group(1)}{int(title.group(2)):02d}{int(day.group(0)):02d}"
+            else:
+                month = today.month - 1 + cal_ids.index(cal_id)
+                date = f"{today.year + month // 12}{month % 12 + 1:02d}{int(day.group(0)):02d}"
+
+            calendar[date] = is_open
+            self.calendar_cells[date] = (cal_id, row, col)
+        return calendar
+
+    def is_wanted_date(self, date):
+        if self.watch_all_dates:
+            return True
+        if self.want_dates and date in self.want_dates:
+            return True
+        try:
+            weekday = datetime.strptime(date, '%Y%m%d').weekday()
+        except ValueError:
+            return False
+        return bool(self.want_weekdays) and weekday in self.want_weekdays
+
+    def check_calendar(self):
+        # 이전 조회와 비교해서 마감/없음 -> 예약 가능으로 바뀐 원하는 날짜를 반환
+        # 티타임 목록을 아직 못 본 날짜와, recheck_interval 이 지난 날짜도 다시 확인
+        calendar = self.read_calendar()
+        if not calendar:
+            return []
+
+        for date, is_open in calendar.items():
+            if is_open and not self.calendar.get(date):
+                self.checked_at.pop(date, None)
+        self.calendar = calendar
+
+        now = time.monotonic()
+        dates = []
+        for date, is_open in sorted(calendar.items()):
+            if not is_open or not self.is_wanted_date(date):
+                continue
+            if date not in self.checked_at:
+                dates.append(date)
+            elif self.recheck_interval is not None and now - self.checked_at[date] >= self.recheck_interval:
+                dates.append(date)
+        return dates
+
+    def click_date(self, date):
+        cal_id, row, col = self.calendar_cells[date]
+        self.driver.find_element(By.XPATH, f'//*[@id="{cal_id}"]/table/tbody/tr[{row}]/td[{col}]/a').click()
+        self.driver.implicitly_wait(5)
         time.sleep(1)
 
     def book_ticket(self, standard_seat, i):
@@ -160,46 +274,61 @@ class SRT:
             print("예약성공")
         
     def refresh_result(self):
-        self.driver.find_element(By.XPATH, '//*[@id="calendar_view_ajax_2"]/table/tbody/tr[3]/td[2]/a').click()
+        # 달력 전체를 다시 받아오기 위해 예약 페이지를 새로 연다
+        self.driver.get('https://www.sejongcc.com/reservation/real_reservation.do')
         self.cnt_refresh += 1
         print(f"새로고침 {self.cnt_refresh}회")
         self.driver.implicitly_wait(10)
         time.sleep(0.5)
 
+    def find_tee_time(self):
+        # 선택한 날짜의 티타임 목록을 한번의 스크립트 호출로 읽고 8~9시 첫 시간 찾기
+        # find_element 로 읽으면 목록 끝에서 implicitly_wait 만큼 기다리게 됨
+        rows = self.driver.execute_script("""
+            return Array.from(document.querySelectorAll('#tab0 > table > tbody > tr')).map(function (tr) {
+                var tds = tr.querySelectorAll('td');
+                return tds.length >= 3 ? [tds[1].innerText.trim(), tds[2].innerText.trim()] : null;
+            }).filter(function (row) { return row; });
+        """) or []
+
+        reservtime = [0, 0, 0]
+        for csname, tm in rows:
+            rvtime = tm.split(':', 2)
+            if not rvtime[0].isdigit():
+                continue
+            if 8 <= int(rvtime[0]) <= 9 :
+                if csname == "세종" :
+                    csnum = 1
+                elif csname == "행복" :
+                    csnum = 2
+                else :
+                    csnum = 0
+                reservtime[0] = (csnum)
+                reservtime[1] = (rvtime[0])
+                reservtime[2] = (rvtime[1])
+                break
+        return reservtime, len(rows)
+
     def check_result(self):
         while True:
-            #for i in range(1, self.num_trains_to_check+1):
-            #self.is_booked = True
-            reservtime = [0, 0, 0]
-            for i in range(1, 50):
+            for date in self.check_calendar():
+                print(f"{date} 예약 가능, 티타임 확인")
                 try:
-                    #standard_seat = self.driver.find_element(By.CSS_SELECTOR, '//*[@id="tab0"]/table/tbody/tr[1]/td[3]').text
-                    rvtime = self.driver.find_element(By.XPATH, f'//*[@id="tab0"]/table/tbody/tr[{i}]/td[3]').text.split(':', 2)
-                    csname = self.driver.find_element(By.XPATH, f'//*[@id="tab0"]/table/tbody/tr[{i}]/td[2]').text
-                    if 8 <= int(rvtime[0]) <= 9 :
-                        if csname == "세종" :
-                            csnum = 1
-                        elif csname == "행복" :
-                            csnum = 2
-                        else :
-                            csnum = 0
-                        reservtime[0] = (csnum)
-                        reservtime[1] = (rvtime[0])
-                        reservtime[2] = (rvtime[1])
-                        break
-                except NoSuchElementException:
-                    #print("예약 가능 리스트 없음")
-                    break
-
-            if self.book_firsttime(reservtime, i):
-                return self.driver
-            
-            if self.is_booked:
-                return self.driver
+                    self.click_date(date)
+                except (NoSuchElementException, ElementClickInterceptedException):
+                    print(f"{date} 클릭 실패")
+                    continue
+                reservtime, i = self.find_tee_time()
+                self.checked_at[date] = time.monotonic()
 
-            else:
-                time.sleep(randint(2, 4))
-                self.refresh_result()
+                if self.book_firsttime(reservtime, i):
+                    return self.driver
+
+                if self.is_booked:
+                    return self.driver
+
+            time.sleep(randint(2, 4))
+            self.refresh_result()
 
     def run(self, login_id, login_psw):
         self.run_driver()
@@ -208,8 +337,9 @@ class SRT:
         self.go_search()
         self.check_result()
 
-srt_id = 'hoyoun100'
-srt_psw = 'rlaghdus0509$'
-srt = SRT("동탄", "동대구", "20230322", "08")
+if __name__ == "__main__":
+    srt_id = 'hoyoun100'
+    srt_psw = 'rlaghdus0509$'
+    srt = SRT("동탄", "동대구", "20230322", "08")
 
-srt.run(srt_id, srt_psw)
+    srt.run(srt_id, srt_psw)
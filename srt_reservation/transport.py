@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import socket
+import ssl
+import threading
+import time
+import http.client
+
+# 예약에 사용하는 사이트
+srt_host = 'etk.srail.kr'
+korail_host = 'www.letskorail.com'
+golf_host = 'www.sejongcc.com'
+default_hosts = [srt_host, korail_host, golf_host]
+
+
+# 쉬던 연결이 서버에서 이미 끊겼을 때 나는 오류
+closed_conn_errors = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError,
+                      ssl.SSLEOFError, ssl.SSLZeroReturnError)
+
+
+class WarmHTTPSConnection(http.client.HTTPSConnection):
+    # 미리 찾아둔 IP 로 접속하고 이전 TLS 세션을 재사용하는 연결
+    def __init__(self, pool):
+        super().__init__(pool.host, pool.port, timeout=pool.timeout, context=pool.context)
+        self.pool = pool
+
+    def connect(self):
+        # socket.create_connection 처럼 주소를 차례로 시도 (IPv6 경로가 없으면 IPv4 로)
+        err = None
+        for addr in self.pool.resolve():
+            try:
+                sock = socket.create_connection(addr, self.timeout)
+                break
+            except OSError as e:
+                err = e
+        else:
+            raise err
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host, session=self.pool.tls_session)
+        self.pool.save_session(self.sock)
+
+
+class HostPool:
+    def __init__(self, host, port=443, size=2, context=None, timeout=5, dns_ttl=300):
+        """
+        :param host: 접속할 호스트 ex) etk.srail.kr
+        :param port: 접속할 포트
+        :param size: 유지할 연결 수
+        :param context: ssl.SSLContext, 지정하지 않으면 기본 설정 사용
+        :param timeout: 연결 및 응답 대기 시간 (초)
+        :param dns_ttl: DNS 조회 결과를 재사용할 시간 (초)
+        """
+        self.host = host
+        self.port = port
+        self.size = size
+        self.context = context or ssl.create_default_context()
+        self.timeout = timeout
+        self.dns_ttl = dns_ttl
+
+        self.addrs = None  # 미리 찾아둔 (ip, port) 목록
+        self.resolved_at = 0
+        self.tls_session = None  # 재사용할 TLS 세션
+        self.rtt = None  # 측정한 왕복 시간 (초), 지수 이동 평균
+
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def resolve(self, force=False):
+        if force or not self.addrs or time.monotonic() - self.resolved_at > self.dns_ttl:
+            infos = socket.getaddrinfo(self.host, self.port, type=socket.SOCK_STREAM)
+            self.addrs = [info[4][:2] for info in infos]
+            self.resolved_at = time.monotonic()
+        return self.addrs
+
+    def save_session(self, sock):
+        if sock.session is not None:
+            self.tls_session = sock.session
+
+    def get(self, oldest=False):
+        # 평소에는 가장 최근에 쓴 연결, 점검할 때는 가장 오래 쉰 연결을 꺼낸다
+        with self.lock:
+            if self.idle:
+                return self.idle.pop(0 if oldest else -1)
+        return WarmHTTPSConnection(self)
+
+    def put(self, conn):
+        with self.lock:
+            if conn.sock is not None and len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def send(self, conn, method, path, body=None, headers=None):
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            resp = conn.getresponse()
+            data = resp.read()
+        except Exception:
+            conn.close()
+            raise
+        # TLS 1.3 은 세션 티켓을 첫 응답 이후에 받으므로 응답을 읽은 뒤 저장
+        if conn.sock is not None:
+            self.save_session(conn.sock)
+        if resp.will_close:
+            conn.close()
+        self.put(conn)
+        return resp.status, resp.getheaders(), data
+
+    def send_on(self, conn, method, path, body=None, headers=None):
+        # 재사용한 연결이 이미 끊겨 있었던 경우에만 GET/HEAD 를 새 연결로 한번 더 보낸다
+        # 예약, 결제 요청은 서버에 도착했을 수 있으므로 다시 보내지 않음
+        reused = conn.sock is not None
+        try:
+            return self.send(conn, method, path, body=body, headers=headers)
+        except closed_conn_errors:
+            if not reused or method.upper() not in ('GET', 'HEAD'):
+                raise
+        return self.send(WarmHTTPSConnection(self), method, path, body=body, headers=headers)
+
+    def request(self, method, path, body=None, headers=None):
+        return self.send_on(self.get(), method, path, body=body, headers=headers)
+
+    def timed_head(self, conn, path='/'):
+        start = time.perf_counter()
+        self.send_on(conn, 'HEAD', path)
+        elapsed = time.perf_counter() - start
+        self.rtt = elapsed if self.rtt is None else self.rtt * 0.8 + elapsed * 0.2
+        return elapsed
+
+    def warm_up(self, path='/'):
+        # DNS 조회와 TCP/TLS 연결을 미리 해두고, 요청을 한번씩 보내 재사용할 TLS 세션을 받아둔다
+        self.resolve(force=True)
+        conns = [self.get() for _ in range(self.size)]
+        for conn in conns:
+            self.timed_head(conn, path)
+
+    def probe(self, path='/'):
+        # 쉬고 있는 연결 모두에 가벼운 HEAD 요청을 보내 연결을 유지하고 왕복 시간을 잰다
+        with self.lock:
+            conns = len(self.idle) or 1
+        elapsed = None
+        for _ in range(conns):
+            elapsed = self.timed_head(self.get(oldest=True), path)
+        return elapsed
+
+
+class Transport:
+    def __init__(self, hosts=None, probe_interval=10, **pool_kwargs):
+        """
+        :param hosts: 연결을 유지할 호스트 목록, 지정하지 않으면 SRT, KORAIL, 세종cc
+        :param probe_interval: 연결 유지 및 RTT 측정 주기 (초)
+        :param pool_kwargs: HostPool 에 넘길 설정 ex) size=2, timeout=5
+        """
+        self.probe_interval = probe_interval
+        self.pool_kwargs = pool_kwargs
+        self.pools = {}
+        for host in hosts or default_hosts:
+            self.pool(host)
+
+        self.probe_thread = None
+        self.stop_event = threading.Event()
+
+    def pool(self, host):
+        if host not in self.pools:
+            self.pools[host] = HostPool(host, **self.pool_kwargs)
+        return self.pools[host]
+
+    def request(self, host, method, path, body=None, headers=None):
+        return self.pool(host).request(method, path, body=body, headers=headers)
+
+    def warm_up(self):
+        for host, pool in self.pools.items():
+            try:
+                pool.warm_up()
+            except (OSError, http.client.HTTPException) as err:
+                print(f"{host} 연결 준비 실패: {err}")
+
+    def warm_up_at(self, release_time, lead=5):
+        # 오픈 시각 lead 초 전까지 기다렸다가 연결을 준비한다
+        wait = release_time.timestamp() - lead - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        self.warm_up()
+
+    def probe_all(self):
+        for host, pool in self.pools.items():
+            try:
+                pool.probe()
+            except (OSError, http.client.HTTPException) as err:
+                print(f"{host} 응답 없음: {err}")
+
+    def run_probes(self):
+        while not self.stop_event.wait(self.probe_interval):
+            self.probe_all()
+
+    def start_probes(self):
+        if self.probe_thread is None:
+            self.stop_event.clear()
+            self.probe_thread = threading.Thread(target=self.run_probes, daemon=True)
+            self.probe_thread.start()
+
+    def stop_probes(self):
+        if self.probe_thread is not None:
+            self.stop_event.set()
+            self.probe_thread.join()
+            self.probe_thread = None
+
+    def rtt(self, host):
+        return self.pool(host).rtt
+
+    def close(self):
+        self.stop_probes()
+        for pool in self.pools.values():
+            with pool.lock:
+                for conn in pool.idle:
+                    conn.close()
+                pool.idle = []
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('selenium')
+# myTestmain 은 srt_reservation 폴더 안에서 실행하는 스크립트라 exceptions, validation 을 바로 import 함
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'srt_reservation'))
+import myTestmain
+
+
+def cell(cal_id, day, row=1, col=1, is_open=False, cal_text="", link=""):
+    return [cal_id, cal_text, row, col, str(day), is_open, link]
+
+
+class StubDriver:
+    # execute_script 결과로 고정된 달력 칸 목록을 돌려주는 드라이버
+    def __init__(self, cells):
+        self.cells = cells
+
+    def execute_script(self, script, *args):
+        if 'result.push' in script:
+            return self.cells
+        return True
+
+
+def make_golf(cells, **kwargs):
+    golf = myTestmain.SRT("동탄", "동대구", "20230322", "08", **kwargs)
+    golf.driver = StubDriver(cells)
+    return golf
+
+
+def test_skips_neighbour_month_days_on_title_path():
+    title = "2023.03\n일 월 화 수 목 금 토"
+    cells = [cell("calendar_view_ajax_1", day, row=1, col=col + 1, cal_text=title)
+             for col, day in enumerate([26, 27, 28, 1, 2, 3, 4])]
+    cells += [cell("calendar_view_ajax_1", day, row=5, col=col + 1, cal_text=title, is_open=(day == 31))
+              for col, day in enumerate([26, 27, 28, 29, 30, 31, 1])]
+
+    calendar = make_golf(cells).read_calendar()
+
+    assert sorted(calendar)[0] == "20230301"
+    assert "20230226" not in calendar and "20230426" not in calendar
+    assert calendar["20230331"] is True
+    assert calendar["20230301"] is False
+
+
+def test_link_date_wins_over_title():
+    golf = make_golf([cell("calendar_view_ajax_1", 1, cal_text="2023.03"),
+                      cell("calendar_view_ajax_1", 2, row=1, col=2, is_open=True, cal_text="2023.03",
+                           link="javascript:timefrom_change('20230402')")])
+
+    calendar = golf.read_calendar()
+
+    assert calendar == {"20230301": False, "20230402": True}
+    assert golf.calendar_cells["20230402"] == ("calendar_view_ajax_1", 1, 2)
+
+
+def test_position_fallback_rolls_over_to_january(monkeypatch):
+    class December(datetime):
+        @classmethod
+        def today(cls):
+            return cls(2023, 12, 15)
+
+    monkeypatch.setattr(myTestmain, 'datetime', December)
+    cells = [cell("calendar_view_ajax_2", 1), cell("calendar_view_ajax_1", 1)]
+
+    calendar = make_golf(cells).read_calendar()
+
+    assert set(calendar) == {"20231201", "20240101"}
+
+
+def test_check_calendar_only_returns_dates_that_opened():
+    golf = make_golf([cell("calendar_view_ajax_1", 1, cal_text="2023.03"),
+                      cell("calendar_view_ajax_1", 22, is_open=True, cal_text="2023.03")])
+
+    assert golf.check_calendar() == ["20230322"]
+    golf.checked_at["20230322"] = 0
+
+    # 계속 열려 있으면 다시 들어가지 않음
+    assert golf.check_calendar() == []
+
+    # 마감됐다가 다시 열리면 다시 확인
+    golf.driver.cells[1][5] = False
+    assert golf.check_calendar() == []
+    golf.driver.cells[1][5] = True
+    assert golf.check_calendar() == ["20230322"]
+
+
+def test_empty_read_keeps_previous_calendar():
+    golf = make_golf([cell("calendar_view_ajax_1", 1, is_open=True, cal_text="2023.03")],
+                     want_dates=["20230301"])
+    golf.check_calendar()
+    golf.driver.cells = []
+
+    assert golf.check_calendar() == []
+    assert golf.calendar == {"20230301": True}
+
+
+def test_find_tee_time_reads_list_in_one_call():
+    class TeeDriver:
+        def execute_script(self, script, *args):
+            return [["세종", "07:30"], ["행복", "08:14"], ["세종", "09:00"]]
+
+    golf = make_golf([])
+    golf.driver = TeeDriver()
+
+    assert golf.find_tee_time() == ([2, "08", "14"], 3)
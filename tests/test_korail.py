@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+pytest.importorskip('selenium')
+from srt_reservation.korail import KORAIL
+
+
+def train(row_num, hhmm, standard="예약하기", can_book=True):
+    return [row_num, f"조치원\n{hhmm}", standard, "", can_book, False]
+
+
+class StubDriver:
+    # execute_script 결과를 페이지별로 고정해둔 드라이버
+    def __init__(self, pages):
+        self.pages = pages
+        self.frame_page = None
+        self.prefetches = 0
+
+    def execute_script(self, script, *args):
+        if 'thead' in script:
+            return ["구분", "열차번호", "출발", "도착", "특실", "일반실", "예약대기"]
+        if "createElement('iframe')" in script:
+            current = 0 if not args[1] else self.frame_page
+            if current + 1 >= len(self.pages):
+                return False
+            self.frame_page = current + 1
+            self.prefetches += 1
+            return True
+        if 'data-loaded' in script:
+            return True
+        if 'tbody > tr' in script:
+            return self.pages[self.frame_page if args[1] else 0]
+        raise AssertionError(script)
+
+
+def make_korail(pages, **kwargs):
+    korail = KORAIL("조치원", "영등포", "2023", "3", "10", "18", **kwargs)
+    korail.driver = StubDriver(pages)
+    return korail
+
+
+def test_walks_prefetched_pages_until_window_end():
+    pages = [
+        [train(1, "18:05"), train(3, "18:40")],
+        [train(1, "19:10"), train(3, "20:30")],
+        [train(1, "21:00"), train(3, "22:15")],
+        [train(1, "23:00")],
+    ]
+    korail = make_korail(pages, dpt_tm_end="21")
+
+    trains = [(page, dpt_time) for page, _, dpt_time, *_ in korail.iter_result_trains()]
+
+    assert trains == [(1, "18:05"), (1, "18:40"), (2, "19:10"), (2, "20:30"), (3, "21:00")]
+    # 3 페이지 마지막 기차가 범위를 넘으므로 4 페이지는 받지 않음
+    assert korail.driver.prefetches == 2
+
+
+def test_counts_num_trains_to_check_across_pages():
+    pages = [
+        [train(1, "18:05"), train(3, "18:40")],
+        [train(1, "19:10"), train(3, "20:30")],
+        [train(1, "21:00")],
+    ]
+    korail = make_korail(pages, num_trains_to_check=3)
+
+    trains = [dpt_time for _, _, dpt_time, *_ in korail.iter_result_trains()]
+
+    assert trains == ["18:05", "18:40", "19:10"]
+    assert korail.driver.prefetches == 1
+
+
+def test_reports_missing_booking_link():
+    korail = make_korail([[train(1, "18:05", standard="-", can_book=False)]])
+
+    (page, row_num, dpt_time, standard, reservation, can_book, can_reserve), = korail.iter_result_trains()
+
+    assert (page, row_num, can_book, can_reserve) == (1, 1, False, False)
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import http.client
+import http.server
+import importlib.util
+import os
+import socket
+import ssl
+import threading
+
+import pytest
+
+here = os.path.dirname(os.path.abspath(__file__))
+cert_path = os.path.join(here, 'localhost.pem')
+
+# srt_reservation/__init__.py 가 selenium 을 import 하므로 transport 모듈만 직접 불러온다
+spec = importlib.util.spec_from_file_location(
+    'transport', os.path.join(here, os.pardir, 'srt_reservation', 'transport.py'))
+transport = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(transport)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_HEAD(self):
+        self.server.head_clients.append(self.client_address)
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def do_POST(self):
+        # 응답 없이 연결을 끊는다
+        self.server.posts += 1
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.posts = 0
+    server.head_clients = []
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_server):
+    context = ssl.create_default_context(cafile=cert_path)
+    t = transport.Transport(hosts=['127.0.0.1'], probe_interval=0.05,
+                            port=stub_server.server_address[1], context=context)
+    yield t
+    t.close()
+
+
+def test_warm_up_opens_pool_with_resumable_session(stub_server, client):
+    client.warm_up()
+    pool = client.pool('127.0.0.1')
+
+    assert len(pool.idle) == 2
+    assert stub_server.connections == 2
+    assert client.rtt('127.0.0.1') is not None
+
+    conn = transport.WarmHTTPSConnection(pool)
+    conn.connect()
+    assert conn.sock.session_reused
+    conn.close()
+
+
+def test_requests_reuse_warm_connections(stub_server, client):
+    client.warm_up()
+    for _ in range(3):
+        status, headers, body = client.request('127.0.0.1', 'GET', '/')
+        assert (status, body) == (200, b'ok')
+    assert stub_server.connections == 2
+
+
+def test_dropped_post_is_not_resent(stub_server, client):
+    client.warm_up()
+    with pytest.raises(http.client.RemoteDisconnected):
+        client.request('127.0.0.1', 'POST', '/book', body=b'x')
+    assert stub_server.posts == 1
+
+
+def test_probe_touches_every_idle_connection(stub_server, client):
+    client.warm_up()
+    del stub_server.head_clients[:]
+
+    client.pool('127.0.0.1').probe()
+    assert len(set(stub_server.head_clients)) == 2
+
+
+def test_probe_thread_updates_rtt(stub_server, client):
+    pool = client.pool('127.0.0.1')
+    client.start_probes()
+    client.stop_event.wait(0.3)
+    client.stop_probes()
+    assert pool.rtt is not None
+
+
+def test_connect_falls_back_to_next_address(stub_server, client):
+    pool = client.pool('127.0.0.1')
+    unused = socket.socket()
+    unused.bind(('127.0.0.1', 0))
+    dead_addr = unused.getsockname()
+    unused.close()
+
+    pool.resolve()
+    pool.addrs = [dead_addr] + pool.addrs
+    status, headers, body = client.request('127.0.0.1', 'GET', '/')
+    assert status == 200
+
+
+@pytest.mark.parametrize('error', [ConnectionResetError, ssl.SSLEOFError])
+def test_reset_idle_connection_resends_only_idempotent(stub_server, client, error):
+    pool = client.pool('127.0.0.1')
+    client.warm_up()
+
+    def fail(*args, **kwargs):
+        raise error()
+
+    for conn in pool.idle:
+        conn.request = fail
+    status, headers, body = client.request('127.0.0.1', 'GET', '/')
+    assert status == 200
+
+    pool.idle[0].request = fail
+    with pytest.raises(error):
+        pool.send_on(pool.idle[0], 'POST', '/book', body=b'x')
+    assert stub_server.posts == 0